@@ -0,0 +1,276 @@
+#architecture_search.py
+
+# Latency-aware architecture search for the cascade's fast (NN1) and slow (NN2) networks.
+# Like preprocess_and_train.py, the search step needs Tensorflow, pandas and sklearn and has to be
+# run on an external computer. It trains a grid of small MLP shapes in parallel on the PID research
+# data and converts each to TFLite. Once training is done, each candidate's per-inference latency is
+# measured one at a time through NeuralNetController (the same tflite_micro_runtime engine used by
+# main.py). If tflite_micro_runtime isn't installed, the latency is measured with
+# tf.lite.Interpreter instead, and the "benchmark" step (numpy only) can be re-run on the Raspberry
+# Pi to replace those numbers with on-device ones.
+#
+# Usage:
+#   python architecture_search.py search                 # train + measure the grid, print the Pareto front
+#   python architecture_search.py benchmark              # re-measure latency of saved candidates (on the Pi)
+#   python architecture_search.py export --fast 8-4-1 --slow 32-16-1
+#   python architecture_search.py export --max-mae 5.0 [--slow 32-16-1]
+#                                                         # copy the chosen models into NN1 / NN2
+
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import numpy as np
+
+CANDIDATE_FOLDER = "neural_networks/candidates"
+RESULTS_PATH = os.path.join(CANDIDATE_FOLDER, "search_results.csv")
+BENCHMARK_INPUTS_PATH = os.path.join(CANDIDATE_FOLDER, "benchmark_inputs.npy")  # Raw test inputs for timing
+MODEL_FILES = ["thermal_controller_model.h5", "thermal_controller_model.tflite", "scaler_mean.npy", "scaler_scale.npy"]
+FIRST_LAYER_SIZES = [4, 8, 16, 32, 64]
+SECOND_LAYER_SIZES = [0, 2, 4, 8, 16, 32]  # 0 = single hidden layer
+RESULT_HEADER = ["Shape", "Params", "Val MAE", "Latency (ms)", "Latency Engine", "Pareto"]
+
+
+def load_training_data():
+    import pandas as pd
+
+    files = sorted(glob.glob("research_data/PID/raw_data*.csv"))
+    df = pd.concat([pd.read_csv(file) for file in files], ignore_index=True)
+    df.columns = df.columns.str.strip()
+
+    X = df[["Temperature (C)", "Latency (ms)", "Power (W)"]].values  # Inputs
+    y = df["Duty Cycle (%)"].values                                  # Output
+    return X, y
+
+
+def build_grid():
+    shapes = []
+    for first in FIRST_LAYER_SIZES:
+        for second in SECOND_LAYER_SIZES:
+            if second <= first:
+                shapes.append((first, second))
+    return shapes
+
+
+def shape_name(shape):
+    return "-".join(str(units) for units in shape if units > 0) + "-1"
+
+
+def measure_latency(candidate_path, X_raw, repeats=500):
+    """Average per-inference latency in ms, using the same engine as NeuralNetController where available."""
+    try:
+        from nn_controller import NeuralNetController
+    except ImportError:
+        NeuralNetController = None
+
+    samples = [X_raw[i % len(X_raw)] for i in range(repeats)]
+
+    if NeuralNetController is not None:
+        controller = NeuralNetController(candidate_path + "/")
+        for temperature, latency, power in samples[:20]:  # Warm up
+            controller.predict(temperature, power, latency)
+        start = time.perf_counter()
+        for temperature, latency, power in samples:
+            controller.predict(temperature, power, latency, use_cache=False)
+        return (time.perf_counter() - start) * 1000 / repeats, "tflite_micro_runtime"
+
+    import tensorflow as tf
+    interpreter = tf.lite.Interpreter(model_path=os.path.join(candidate_path, "thermal_controller_model.tflite"))
+    interpreter.allocate_tensors()
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+    mean = np.load(os.path.join(candidate_path, "scaler_mean.npy"))
+    scale = np.load(os.path.join(candidate_path, "scaler_scale.npy"))
+
+    def predict(raw_input):
+        input_data = np.array([(np.array(raw_input) - mean) / scale], dtype=np.float32)
+        interpreter.set_tensor(input_details[0]['index'], input_data)
+        interpreter.invoke()
+        return max(0, min(100, float(interpreter.get_tensor(output_details[0]['index'])[0][0])))
+
+    for raw_input in samples[:20]:
+        predict(raw_input)
+    start = time.perf_counter()
+    for raw_input in samples:
+        predict(raw_input)
+    return (time.perf_counter() - start) * 1000 / repeats, "tf.lite.Interpreter"
+
+
+def train_candidate(args):
+    """Trains and converts one candidate. Latency is measured later, once no other candidate is training."""
+    shape, X_train, y_train, X_test, y_test, mean, scale, epochs = args
+
+    # Imported per worker so each spawned process gets its own single-threaded Tensorflow
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    first, second = shape
+    layers = [Dense(first, activation='relu', input_shape=(X_train.shape[1],))]
+    if second > 0:
+        layers.append(Dense(second, activation='relu'))
+    layers.append(Dense(1))
+    model = Sequential(layers)
+
+    model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    model.fit(X_train, y_train, epochs=epochs, validation_data=(X_test, y_test), verbose=0)
+    _, val_mae = model.evaluate(X_test, y_test, verbose=0)
+
+    name = shape_name(shape)
+    candidate_path = os.path.join(CANDIDATE_FOLDER, name)
+    os.makedirs(candidate_path, exist_ok=True)
+    model.save(os.path.join(candidate_path, "thermal_controller_model.h5"))
+    np.save(os.path.join(candidate_path, "scaler_mean.npy"), mean)
+    np.save(os.path.join(candidate_path, "scaler_scale.npy"), scale)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(os.path.join(candidate_path, "thermal_controller_model.tflite"), "wb") as f:
+        f.write(converter.convert())
+
+    print(f"Trained {name}: Val MAE {val_mae:.3f}")
+    return [name, model.count_params(), float(val_mae)]
+
+
+def mark_pareto_front(results):
+    """A candidate is on the front if no other candidate is at least as accurate and as fast, and strictly better in one."""
+    for row in results:
+        dominated = any(
+            other[2] <= row[2] and other[3] <= row[3] and (other[2] < row[2] or other[3] < row[3])
+            for other in results
+        )
+        row[5] = not dominated
+    return results
+
+
+def save_results(results):
+    os.makedirs(CANDIDATE_FOLDER, exist_ok=True)
+    with open(RESULTS_PATH, "w", newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_HEADER)
+        for name, params, val_mae, latency, engine, pareto in sorted(results, key=lambda row: row[3]):
+            writer.writerow([name, params, round(val_mae, 4), round(latency, 5), engine, pareto])
+
+
+def load_results():
+    with open(RESULTS_PATH, newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [[name, int(params), float(val_mae), float(latency), engine, pareto == "True"]
+                for name, params, val_mae, latency, engine, pareto in reader]
+
+
+def print_pareto_front(results):
+    print("\nAccuracy/latency Pareto front:")
+    print(f"{'Shape':<12}{'Params':>8}{'Val MAE':>10}{'Latency (ms)':>15}")
+    for name, params, val_mae, latency, engine, pareto in sorted(results, key=lambda row: row[3]):
+        if pareto:
+            print(f"{name:<12}{params:>8}{val_mae:>10.3f}{latency:>15.4f}")
+    print(f"\nFull results saved to: {RESULTS_PATH}")
+
+
+def measure_candidates(results, X_raw):
+    # One candidate at a time, so each timing isn't skewed by other work on the CPU
+    for row in results:
+        row[3], row[4] = measure_latency(os.path.join(CANDIDATE_FOLDER, row[0]), X_raw)
+        print(f"{row[0]}: {row[3]:.4f} ms ({row[4]})")
+    return results
+
+
+def search(workers, epochs):
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = load_training_data()
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    X_train, X_test, y_train, y_test, _, X_test_raw = train_test_split(
+        X_scaled, y, X, test_size=0.2, random_state=42)
+
+    os.makedirs(CANDIDATE_FOLDER, exist_ok=True)
+    np.save(BENCHMARK_INPUTS_PATH, X_test_raw)
+
+    jobs = [(shape, X_train, y_train, X_test, y_test, scaler.mean_, scaler.scale_, epochs)
+            for shape in build_grid()]
+    print(f"Training {len(jobs)} candidates on {workers} worker(s)...")
+
+    # Spawn rather than fork so Tensorflow isn't shared between processes
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        results = [row + [None, None, False] for row in pool.map(train_candidate, jobs)]
+
+    print("\nMeasuring latency...")
+    measure_candidates(results, X_test_raw)
+    save_results(mark_pareto_front(results))
+    print_pareto_front(results)
+
+
+def benchmark():
+    results = measure_candidates(load_results(), np.load(BENCHMARK_INPUTS_PATH))
+    save_results(mark_pareto_front(results))
+    print_pareto_front(results)
+
+
+def export(fast, slow, max_mae):
+    results = {row[0]: row for row in load_results()}
+
+    # NN1 must be picked explicitly or be the fastest candidate within an accuracy limit, never just the smallest
+    if fast is None:
+        if max_mae is None:
+            sys.exit("Choose NN1 with --fast <shape> or --max-mae <limit>.")
+        acceptable = [row for row in results.values() if row[2] <= max_mae]
+        if not acceptable:
+            sys.exit(f"No candidate has a Val MAE within {max_mae}.")
+        fast = min(acceptable, key=lambda row: row[3])[0]
+    if slow is None:
+        slow = min(results.values(), key=lambda row: row[2])[0]  # Most accurate candidate
+
+    for name in [fast, slow]:
+        if name not in results:
+            sys.exit(f"Unknown candidate {name}. See {RESULTS_PATH}.")
+    if fast == slow:
+        sys.exit(f"NN1 and NN2 would both be {fast}; choose different candidates.")
+    if results[fast][3] >= results[slow][3]:
+        sys.exit(f"NN1 ({fast}, {results[fast][3]:.4f} ms) is not faster than NN2 ({slow}, {results[slow][3]:.4f} ms).")
+
+    for name, target in [(fast, "NN1"), (slow, "NN2")]:
+        source_path = os.path.join(CANDIDATE_FOLDER, name)
+        target_path = os.path.join("neural_networks", target)
+        os.makedirs(target_path, exist_ok=True)
+        for file in MODEL_FILES:
+            shutil.copy(os.path.join(source_path, file), os.path.join(target_path, file))
+        print(f"Exported {name} to {target_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency-aware architecture search for NN1(fast) and NN2(slow)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    search_parser = subparsers.add_parser("search", help="Train the grid of MLP shapes and measure latency")
+    search_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel training processes")
+    search_parser.add_argument("--epochs", type=int, default=50)
+
+    subparsers.add_parser("benchmark", help="Re-measure latency of the saved candidates")
+
+    export_parser = subparsers.add_parser("export", help="Copy the chosen candidates into NN1 and NN2")
+    export_parser.add_argument("--fast", help="Shape for NN1, e.g. 8-4-1")
+    export_parser.add_argument("--max-mae", type=float, help="Without --fast, use the fastest candidate with a Val MAE at or below this")
+    export_parser.add_argument("--slow", help="Shape for NN2, e.g. 32-16-1 (default: most accurate candidate)")
+
+    args = parser.parse_args()
+    if args.command == "search":
+        search(args.workers, args.epochs)
+    elif args.command == "benchmark":
+        benchmark()
+    elif args.command == "export":
+        export(args.fast, args.slow, args.max_mae)
+    else:
+        parser.print_help()
+
+if __name__=="__main__":
+    main()
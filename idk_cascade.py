@@ -6,12 +6,13 @@ from pid_controller import PIDController
 from nn_controller import NeuralNetController
 
 class IDKCascade:
-    def __init__(self, baseline_temp=16.0, conf_threshold=0.5, deadline=1.5):
+    def __init__(self, baseline_temp=16.0, conf_threshold=0.5, deadline=1.5, nn_fast=None, nn_slow=None):
         self.baseline_temp = baseline_temp
         self.conf_threshold = conf_threshold
         self.deadline = deadline
-        self.nn_fast = NeuralNetController("neural_networks/NN1/")
-        self.nn_slow = NeuralNetController("neural_networks/NN2/")
+        # Pass in already loaded controllers to share inference between cascades
+        self.nn_fast = nn_fast if nn_fast is not None else NeuralNetController("neural_networks/NN1/")
+        self.nn_slow = nn_slow if nn_slow is not None else NeuralNetController("neural_networks/NN2/")
         self.pid = PIDController(kp=7.5, ki=0.6, kd=1.0, setpoint=baseline_temp)
         self.P_nn1, self.P_nn2, self.P_pid = 0.3, 0.05, 0.05
         self.stage_counts = {"NN_FAST": 0, "NN_SLOW": 0, "PID": 0}
@@ -3,8 +3,9 @@
 from sensors import TemperatureSensors
 from research_logger import ResearchLogger
 from pid_controller import PIDController
-from nn_controller import NeuralNetController
 from idk_cascade import IDKCascade
+from shadow_evaluator import ShadowEvaluator, load_shared_model, is_valid_mode, parse_shadow_modes
+from trial_profiler import TrialProfiler, install_signal_handler
 
 import time
 import RPi.GPIO as GPIO
@@ -27,7 +28,7 @@ def get_user_input():
     print("Available Modes: PID, NN1 (fast), NN2 (slow), IDK_0.3, IDK_0.5, IDK_0.7")
     model_choice = input("Enter control model: ").strip().upper()
 
-    if not (model_choice == "PID" or model_choice.startswith("NN") or model_choice.startswith("IDK_")):
+    if not is_valid_mode(model_choice):
         print("Invalid model. Defaulting to PID.")
         model_choice = "PID"
 
@@ -51,39 +52,71 @@ def get_user_input():
             print("Invalid input. Using default 45 minutes")
             duration = 45
 
+    shadow_modes = []
+    if logging_enabled == True:
+        shadow_input = input("Enter shadow models to evaluate alongside, comma separated (default = none): ")
+        shadow_modes, invalid_modes = parse_shadow_modes(shadow_input.split(","), model_choice)
+        for mode in invalid_modes:
+            print(f"Invalid shadow model {mode}. Skipping.")
+
     print("\n\n\n")
 
-    return model_choice, baseline_temp, logging_enabled, duration
+    return model_choice, baseline_temp, logging_enabled, duration, shadow_modes
 
 
-def main():
-    model_type, baselineTemp, logging, duration = get_user_input()
+def setup_heater(mosfet_pin=12):
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setup(mosfet_pin, GPIO.OUT)
+    element_pwm = GPIO.PWM(mosfet_pin, 20000)
+    element_pwm.start(0)
+    return element_pwm
+
+
+def run_trial(model_type, baselineTemp, logging, duration, shadow_modes=None, trial_number=None):
+    """Runs one trial; returns True if it ran for its full duration and False if interrupted."""
+    if not is_valid_mode(model_type):
+        raise ValueError(f"Invalid mode: {model_type}")
+    shadow_modes, invalid_modes = parse_shadow_modes(shadow_modes or [], model_type)
+    if invalid_modes:
+        raise ValueError(f"Invalid shadow mode(s): {', '.join(invalid_modes)}")
+    completed = False
 
     temp_sensors = TemperatureSensors()
-    logger = ResearchLogger(trial_name=model_type, baseline_temp=baselineTemp, log_interval=1.0, duration_minutes=duration) if logging else None
+    logger = ResearchLogger(trial_name=model_type, baseline_temp=baselineTemp, log_interval=1.0, duration_minutes=duration, trial_number=trial_number) if logging else None
     
     pid = PIDController(kp=5.0, ki=0.5, kd=1.0, setpoint=baselineTemp)
     
     NN = None
     cascade = None 
+    shared_models = {}
 
     if model_type.startswith("IDK_"):
         conf_value = float(model_type.split("_")[1])
-        cascade = IDKCascade(baseline_temp=baselineTemp, conf_threshold=conf_value)
+        cascade = IDKCascade(baseline_temp=baselineTemp, conf_threshold=conf_value,
+                             nn_fast=load_shared_model("NN1", shared_models),
+                             nn_slow=load_shared_model("NN2", shared_models))
     
     elif model_type.startswith("NN"):
-        NN_Path = "neural_networks/" + model_type + "/"
-        NN = NeuralNetController(NN_Path)
+        NN = load_shared_model(model_type, shared_models)
 
-    mosfet_pin = 12
-    GPIO.setwarnings(False)
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(mosfet_pin, GPIO.OUT)
-    element_pwm = GPIO.PWM(mosfet_pin, 20000)
-    element_pwm.start(0)
+    shadow = None
+    if logging and shadow_modes:
+        shadow = ShadowEvaluator(shadow_modes, baselineTemp, logger.folder_path, logger.file_tag, shared_models)
+
+    # kill -USR1 <pid> toggles profiling of the next 60 ticks
+    profiler = TrialProfiler(logger.folder_path if logging else "research_data")
+    profiler.attach()
+
+    element_pwm = setup_heater()
+    tick_interval = 1.0
 
     try:
         while True:
+            tick_start = time.time()
+            for model in shared_models.values():
+                model.clear_cache()
+            profiler.begin_tick()
             current_avg_temp = temp_sensors.read_avg_temperature([True, True, True, True], "c")
             source, confidence = model_type, None
 
@@ -105,8 +138,15 @@ def main():
             duty_cycle = max(0, min(100, duty_cycle))
             element_pwm.ChangeDutyCycle(duty_cycle)
 
+            # Shadow controllers get the same inputs as the active controller, captured before this tick is logged
+            if shadow is not None and len(logger.latencies) > 1 and len(logger.power_history) > 1:
+                shadow_inputs = (logger.latencies[-1], logger.power_history[-1])
+            else:
+                shadow_inputs = (None, None)
+
             if logging:
                 if not logger.log(current_avg_temp, duty_cycle, confidence, source):
+                    completed = True
                     break
                 if confidence is not None:
                     overwrite_console(model_type, current_avg_temp, baselineTemp, duty_cycle, 
@@ -126,16 +166,33 @@ def main():
             else:
                 overwrite_console(model_type, current_avg_temp, baselineTemp, duty_cycle)
 
-            time.sleep(1)
+            # Shadow work only uses the slack left in this tick, so the next PWM update stays on schedule
+            if shadow is not None:
+                shadow.evaluate(current_avg_temp, shadow_inputs[0], shadow_inputs[1], source, duty_cycle,
+                                deadline=tick_start + tick_interval)
+
+            profiler.end_tick()
+            time.sleep(max(0, tick_interval - (time.time() - tick_start)))
 
     except KeyboardInterrupt:
         print("Interrupted by user.")
     finally:
+        profiler.detach()
         element_pwm.stop()
         GPIO.cleanup()
+        if shadow is not None:
+            shadow.summarize()
         if logging:
-            logger.summarize(stages=cascade.get_stage_breakdown())
+            logger.summarize(stages=cascade.get_stage_breakdown() if cascade is not None else None)
         print("System shutdown complete.")
 
+    return completed
+
+
+def main():
+    install_signal_handler()
+    model_type, baselineTemp, logging, duration, shadow_modes = get_user_input()
+    run_trial(model_type, baselineTemp, logging, duration, shadow_modes)
+
 if __name__=="__main__":
     main()
@@ -9,8 +9,14 @@ import busio
 from adafruit_ina219 import INA219
 from datetime import datetime
 
+def trial_folder(trial_name, base_folder="research_data"):
+    if trial_name.startswith("IDK_"):
+        return os.path.join(base_folder, "IDK_CASCADE", trial_name)
+    return os.path.join(base_folder, trial_name)
+
+
 class ResearchLogger:
-    def __init__(self, trial_name="PID", baseline_temp=16.0, log_interval=1.0, duration_minutes=45):
+    def __init__(self, trial_name="PID", baseline_temp=16.0, log_interval=1.0, duration_minutes=45, trial_number=None):
         self.trial_name = trial_name
         self.baseline_temp = baseline_temp
         self.log_interval = log_interval
@@ -24,18 +30,15 @@ class ResearchLogger:
         i2c = busio.I2C(board.SCL, board.SDA)
         self.ina = INA219(i2c)
 
-        base_folder = "research_data"
-
-        if trial_name.startswith("IDK_"):
-            self.folder_path = os.path.join(base_folder, "IDK_CASCADE", trial_name)
-        else:
-            self.folder_path = os.path.join(base_folder, trial_name)
+        self.folder_path = trial_folder(trial_name)
 
         os.makedirs(self.folder_path, exist_ok=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.raw_data_path = os.path.join(self.folder_path, f"raw_data_{timestamp}.csv")
-        self.summary_path = os.path.join(self.folder_path, f"summary_{timestamp}.csv")
+        # Numbered trials (raw_data_1.csv, ...) for repeated sets, otherwise timestamped files
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.file_tag = str(trial_number) if trial_number is not None else self.timestamp
+        self.raw_data_path = os.path.join(self.folder_path, f"raw_data_{self.file_tag}.csv")
+        self.summary_path = os.path.join(self.folder_path, f"summary_{self.file_tag}.csv")
 
         with open(self.raw_data_path, "w", newline='') as f:
             writer = csv.writer(f)
@@ -0,0 +1,159 @@
+#shadow_evaluator.py
+
+# Runs extra controllers in "shadow mode" alongside the active one. Shadow controllers see the
+# same sensor reading, latency and power as the active controller on every tick, but their
+# duty cycles are only logged and never sent to the heater.
+
+import csv
+import os
+import re
+import time
+import statistics
+from pid_controller import PIDController
+from nn_controller import NeuralNetController
+from idk_cascade import IDKCascade
+
+def is_valid_mode(mode):
+    """True only for modes that can actually be built: PID, NN<k> with a model folder, IDK_<threshold in (0, 1)>."""
+    if mode == "PID":
+        return True
+    if re.fullmatch(r"NN\d+", mode):
+        return os.path.isdir("neural_networks/" + mode)
+    if mode.startswith("IDK_"):
+        try:
+            threshold = float(mode[len("IDK_"):])
+        except ValueError:
+            return False
+        return 0 < threshold < 1 and is_valid_mode("NN1") and is_valid_mode("NN2")
+    return False
+
+
+def parse_shadow_modes(modes, active_mode=None):
+    """Returns (valid, invalid) shadow modes, with blanks, duplicates and the active mode dropped."""
+    shadow_modes, invalid_modes = [], []
+    for mode in modes:
+        mode = mode.strip().upper()
+        if not mode or mode == active_mode or mode in shadow_modes:
+            continue
+        if is_valid_mode(mode):
+            shadow_modes.append(mode)
+        else:
+            invalid_modes.append(mode)
+    return shadow_modes, invalid_modes
+
+
+def load_shared_model(name, shared_models):
+    # One NeuralNetController per network, so every stage using NN1/NN2 reuses the same inference.
+    # The caller clears each model's cache at the start of every tick.
+    if name not in shared_models:
+        shared_models[name] = NeuralNetController("neural_networks/" + name + "/")
+    return shared_models[name]
+
+
+class ShadowEvaluator:
+    def __init__(self, modes, baseline_temp, folder_path, timestamp, shared_models, time_budget=0.25):
+        modes, invalid_modes = parse_shadow_modes(modes)
+        if invalid_modes:
+            raise ValueError(f"Invalid shadow mode(s): {', '.join(invalid_modes)}")
+        self.modes = modes
+        self.baseline_temp = baseline_temp
+        self.time_budget = time_budget  # Max seconds of shadow work per tick, on top of the tick's own deadline
+        self.next_start = 0  # Rotates so the same controller isn't always the one skipped
+        self.controllers = {}
+        self.fallback_pids = {}
+        self.duty_history = {mode: [] for mode in modes}
+        self.compute_times = {mode: [] for mode in modes}
+        self.skipped = {mode: 0 for mode in modes}
+
+        for mode in modes:
+            self.fallback_pids[mode] = PIDController(kp=5.0, ki=0.5, kd=1.0, setpoint=baseline_temp)
+            if mode.startswith("IDK_"):
+                conf_value = float(mode.split("_")[1])
+                self.controllers[mode] = IDKCascade(baseline_temp=baseline_temp, conf_threshold=conf_value,
+                                                    nn_fast=load_shared_model("NN1", shared_models),
+                                                    nn_slow=load_shared_model("NN2", shared_models))
+            elif mode.startswith("NN"):
+                self.controllers[mode] = load_shared_model(mode, shared_models)
+            else:
+                self.controllers[mode] = None  # PID uses its fallback controller
+
+        self.shadow_data_path = os.path.join(folder_path, f"shadow_data_{timestamp}.csv")
+        self.shadow_summary_path = os.path.join(folder_path, f"shadow_summary_{timestamp}.csv")
+
+        header = ["Timestamp", "Active Model", "Active Duty (%)"]
+        for mode in modes:
+            header += [f"{mode} Duty (%)", f"{mode} Model", f"{mode} Confidence (%)", f"{mode} Compute (ms)"]
+        with open(self.shadow_data_path, "w", newline='') as f:
+            csv.writer(f).writerow(header)
+
+    def decide(self, mode, current_temp, latency, power):
+        controller = self.controllers[mode]
+        if mode == "PID" or latency is None or power is None:
+            return self.fallback_pids[mode].update(current_temp), mode, None
+        if mode.startswith("NN"):
+            return controller.predict(current_temp, latency, power), mode, None  # Same argument order as main.py
+        return controller.decide(current_temp, latency, power)
+
+    def expected_compute(self, mode):
+        # Typical cost of the last few runs, in seconds, so a slow controller isn't started without room to finish.
+        # Median rather than max, so one outlier can't keep a controller skipped when no new times are recorded.
+        recent = self.compute_times[mode][-10:]
+        return statistics.median(recent) / 1000 if recent else 0
+
+    def evaluate(self, current_temp, latency, power, active_model, active_duty, deadline=None):
+        """Run every shadow controller expected to finish before the budget/deadline; the rest are logged as skipped."""
+        start = time.time()
+        budget_end = start + self.time_budget
+        if deadline is not None:
+            budget_end = min(budget_end, deadline)
+        results = {}
+        order = self.modes[self.next_start:] + self.modes[:self.next_start]
+        self.next_start = (self.next_start + 1) % len(self.modes)
+
+        for mode in order:
+            if budget_end - time.time() <= self.expected_compute(mode):
+                self.skipped[mode] += 1
+                results[mode] = ["", "SKIPPED", "", ""]
+                continue
+
+            stage_start = time.time()
+            duty, source, confidence = self.decide(mode, current_temp, latency, power)
+            compute_ms = (time.time() - stage_start) * 1000
+            duty = max(0, min(100, duty))
+
+            self.duty_history[mode].append(duty)
+            self.compute_times[mode].append(compute_ms)
+            results[mode] = [round(duty, 2), source, round(confidence, 3) if confidence is not None else "", round(compute_ms, 3)]
+
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        row = [timestamp, active_model, round(active_duty, 2)]
+        for mode in self.modes:
+            row += results[mode]
+        with open(self.shadow_data_path, "a", newline='') as f:
+            csv.writer(f).writerow(row)
+
+    def summarize(self):
+        with open(self.shadow_summary_path, "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "Model",
+                "Ticks Evaluated",
+                "Ticks Skipped",
+                "Avg Compute (ms)",
+                "Avg Duty (%)",
+                "# PID",
+                "# NN1(fast)",
+                "# NN2(slow)"
+            ])
+            for mode in self.modes:
+                evaluated = len(self.duty_history[mode])
+                avg_compute = statistics.mean(self.compute_times[mode]) if self.compute_times[mode] else 0
+                avg_duty = statistics.mean(self.duty_history[mode]) if self.duty_history[mode] else 0
+                if mode.startswith("IDK_"):
+                    stages = self.controllers[mode].get_stage_breakdown()
+                    stage_row = [stages["PID"], stages["NN_FAST"], stages["NN_SLOW"]]
+                else:
+                    stage_row = ["", "", ""]
+                writer.writerow([mode, evaluated, self.skipped[mode], round(avg_compute, 3), round(avg_duty, 3)] + stage_row)
+
+        print(f"Shadow summary saved to: {self.shadow_summary_path}")
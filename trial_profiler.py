@@ -0,0 +1,193 @@
+#trial_profiler.py
+
+# On-demand profiling for a running trial. Sending SIGUSR1 to main.py (kill -USR1 <pid>) toggles
+# a cProfile capture of the next N control loop ticks along with periodic tracemalloc and GC
+# snapshots. A short window of uninstrumented ticks is timed first, so the per-tick overhead of
+# cProfile and tracemalloc can be reported against it. Results are dumped next to the trial's CSVs
+# once the capture finishes. While no capture is running the loop hooks return immediately after a
+# single flag check.
+
+import cProfile
+import csv
+import gc
+import io
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from datetime import datetime
+
+# The profiler of the trial currently running, if any. The signal handler is installed once per
+# process, so SIGUSR1 outside a trial (e.g. while a queue waits for cool-down) is simply ignored.
+_attached_profiler = None
+
+def _handle_toggle_signal(signum, frame):
+    if _attached_profiler is not None:
+        _attached_profiler.request_toggle()
+
+def install_signal_handler(signum=signal.SIGUSR1):
+    signal.signal(signum, _handle_toggle_signal)
+
+
+class TrialProfiler:
+    def __init__(self, output_folder, capture_ticks=60, snapshot_interval=10, baseline_ticks=10, top_stats=30):
+        self.output_folder = output_folder
+        self.capture_ticks = capture_ticks
+        self.snapshot_interval = snapshot_interval  # Ticks between tracemalloc/GC snapshots
+        self.baseline_ticks = baseline_ticks  # Uninstrumented ticks timed before each capture
+        self.top_stats = top_stats
+        self.toggle_requested = False
+        self.measuring_baseline = False
+        self.active = False
+        self.profiler = None
+        self.tick_count = 0
+        self.tick_start = None
+        self.baseline_times = []
+        self.tick_rows = []
+        self.snapshots = []
+
+    def attach(self):
+        global _attached_profiler
+        _attached_profiler = self
+
+    def detach(self):
+        global _attached_profiler
+        if _attached_profiler is self:
+            _attached_profiler = None
+        self.stop()
+
+    def request_toggle(self):
+        # Only sets a flag; the actual start/stop happens between ticks in begin_tick()
+        self.toggle_requested = True
+
+    def begin_tick(self):
+        if self.toggle_requested:
+            self.toggle_requested = False
+            if self.active:
+                self.stop()
+            elif self.measuring_baseline:
+                self.measuring_baseline = False
+                print("\n[Profiler] Capture cancelled.")
+            else:
+                self.measuring_baseline = True
+                self.baseline_times = []
+                print(f"\n[Profiler] Timing {self.baseline_ticks} uninstrumented ticks before capturing.")
+        if not (self.active or self.measuring_baseline):
+            return
+
+        self.tick_start = time.perf_counter()
+        if self.active:
+            self.profiler.enable()
+
+    def end_tick(self):
+        if self.measuring_baseline:
+            self.baseline_times.append((time.perf_counter() - self.tick_start) * 1000)  # ms
+            if len(self.baseline_times) >= self.baseline_ticks:
+                self.measuring_baseline = False
+                self.start()
+            return
+        if not self.active:
+            return
+
+        self.profiler.disable()
+        tick_time = (time.perf_counter() - self.tick_start) * 1000  # ms
+        self.tick_count += 1
+
+        snapshot_start = time.perf_counter()
+        gen0, gen1, gen2 = gc.get_count()
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        if self.tick_count % self.snapshot_interval == 0:
+            self.snapshots.append((self.tick_count, tracemalloc.take_snapshot(), gc.get_stats()))
+        snapshot_time = (time.perf_counter() - snapshot_start) * 1000  # ms
+
+        # Everything above the uninstrumented baseline is cProfile/tracemalloc cost, plus the snapshot itself
+        tick_overhead = tick_time - self.baseline_tick_time() + snapshot_time
+
+        self.tick_rows.append([
+            self.tick_count,
+            round(tick_time, 3),
+            round(self.baseline_tick_time(), 3),
+            round(snapshot_time, 3),
+            round(tick_overhead, 3),
+            gen0,
+            gen1,
+            gen2,
+            round(traced_current / 1024, 3),
+            round(traced_peak / 1024, 3)
+        ])
+
+        if self.tick_count >= self.capture_ticks:
+            self.stop()
+
+    def baseline_tick_time(self):
+        return sum(self.baseline_times) / len(self.baseline_times) if self.baseline_times else 0
+
+    def start(self):
+        self.active = True
+        self.profiler = cProfile.Profile()
+        self.tick_count = 0
+        self.tick_rows = []
+        self.snapshots = []
+        tracemalloc.start()
+        self.snapshots.append((0, tracemalloc.take_snapshot(), gc.get_stats()))
+        print(f"\n[Profiler] Capturing {self.capture_ticks} ticks.")
+
+    def stop(self):
+        self.measuring_baseline = False
+        if not self.active:
+            return
+        self.active = False
+
+        final_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.output_folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        profile_path = os.path.join(self.output_folder, f"profile_{timestamp}.prof")
+        report_path = os.path.join(self.output_folder, f"profile_{timestamp}.txt")
+        ticks_path = os.path.join(self.output_folder, f"profile_ticks_{timestamp}.csv")
+        memory_path = os.path.join(self.output_folder, f"memory_{timestamp}.txt")
+
+        self.profiler.dump_stats(profile_path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top_stats)
+        with open(report_path, "w") as f:
+            f.write(stream.getvalue())
+
+        with open(ticks_path, "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "Tick",
+                "Tick Time (ms)",
+                "Baseline Tick Time (ms)",
+                "Snapshot Time (ms)",
+                "Tick Overhead (ms)",
+                "GC Gen0 Count",
+                "GC Gen1 Count",
+                "GC Gen2 Count",
+                "Traced Memory (KB)",
+                "Traced Peak (KB)"
+            ])
+            writer.writerows(self.tick_rows)
+
+        with open(memory_path, "w") as f:
+            base_tick, base_snapshot, _ = self.snapshots[0]
+            for tick, snapshot, gc_stats in self.snapshots[1:]:
+                f.write(f"=== Tick {tick} (vs tick {base_tick}) ===\n")
+                for gen, gen_stats in enumerate(gc_stats):
+                    f.write(f"GC gen{gen}: {gen_stats}\n")
+                for stat in snapshot.compare_to(base_snapshot, "lineno")[:self.top_stats]:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+            f.write(f"=== Final (tick {self.tick_count}) top allocations ===\n")
+            for stat in final_snapshot.statistics("lineno")[:self.top_stats]:
+                f.write(f"{stat}\n")
+
+        if self.tick_rows:
+            avg_tick = sum(row[1] for row in self.tick_rows) / len(self.tick_rows)
+            avg_overhead = sum(row[4] for row in self.tick_rows) / len(self.tick_rows)
+            print(f"\n[Profiler] {self.tick_count} ticks captured. Avg tick: {avg_tick:.2f} ms "
+                  f"(baseline {self.baseline_tick_time():.2f} ms)  Avg overhead: {avg_overhead:.3f} ms")
+        print(f"[Profiler] Results saved to: {report_path}")
@@ -0,0 +1,165 @@
+#trial_queue.py
+
+# Headless runner for a queue of trials. Instead of the interactive prompts in main.py, the trials
+# are read from a JSON file and run back to back, each one writing raw_data_<n>.csv and
+# summary_<n>.csv into the usual research_data/<MODE> folder. Between trials the heater is held
+# off until the temperature slope shows the plant has settled back to equilibrium. Progress is
+# saved after every trial, so re-running the same command after a crash resumes where it stopped.
+#
+# Usage:
+#   python trial_queue.py queue.json
+#
+# Example queue.json:
+#   [
+#       {"mode": "PID", "baseline": 16, "duration": 45, "repetitions": 7},
+#       {"mode": "IDK_0.5", "baseline": 16, "duration": 45, "repetitions": 3, "shadow": ["NN1", "NN2"]}
+#   ]
+
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+import RPi.GPIO as GPIO
+from sensors import TemperatureSensors
+from research_logger import trial_folder
+from main import is_valid_mode, parse_shadow_modes, setup_heater, run_trial
+from trial_profiler import install_signal_handler
+
+# Fields that must not change for an entry once it has started, or its numbered trials won't be comparable
+RESUME_FIELDS = ["mode", "baseline", "duration", "repetitions", "shadow"]
+
+def load_queue(queue_path):
+    """Loads and validates every entry up front, so a bad one can't fail hours into an unattended run."""
+    with open(queue_path) as f:
+        specs = json.load(f)
+
+    for index, spec in enumerate(specs):
+        try:
+            spec["mode"] = spec["mode"].strip().upper()
+            if not is_valid_mode(spec["mode"]):
+                raise ValueError(f"invalid mode {spec['mode']}")
+            spec["baseline"] = float(spec.get("baseline", 16.0))
+            spec["duration"] = float(spec.get("duration", 45.0))
+            if not spec["duration"] > 0:
+                raise ValueError(f"duration must be positive, got {spec['duration']}")
+            repetitions = spec.get("repetitions", 1)
+            if isinstance(repetitions, float) and not repetitions.is_integer():
+                raise ValueError(f"repetitions must be a whole number, got {repetitions}")
+            spec["repetitions"] = int(repetitions)
+            if spec["repetitions"] < 1:
+                raise ValueError(f"repetitions must be at least 1, got {spec['repetitions']}")
+            spec["shadow"], invalid_modes = parse_shadow_modes(spec.get("shadow", []), spec["mode"])
+            if invalid_modes:
+                raise ValueError(f"invalid shadow mode(s) {', '.join(invalid_modes)}")
+        except KeyError as e:
+            raise ValueError(f"Queue entry {index} in {queue_path}: missing field {e}") from e
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Queue entry {index} in {queue_path}: {e}") from e
+    return specs
+
+
+def load_state(state_path):
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state_path, state):
+    # Write then rename, so a crash mid-write can't corrupt the saved progress
+    temp_path = state_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state, f, indent=4)
+    os.replace(temp_path, state_path)
+
+
+def next_trial_number(mode):
+    """First trial number after any raw_data_<n>.csv already in the mode's folder."""
+    folder_path = trial_folder(mode)
+    numbers = [0]
+    if os.path.isdir(folder_path):
+        for file in os.listdir(folder_path):
+            match = re.fullmatch(r"raw_data_(\d+)\.csv", file)
+            if match:
+                numbers.append(int(match.group(1)))
+    return max(numbers) + 1
+
+
+def wait_for_equilibrium(temp_sensors, window=120, slope_threshold=0.05, poll_interval=1.0, timeout_minutes=30.0):
+    """Holds the heater off until the temperature slope over the last `window` seconds is below `slope_threshold` °C/min."""
+    element_pwm = setup_heater()
+    times, temps = [], []
+    start = time.time()
+    try:
+        while True:
+            now = time.time()
+            times.append(now)
+            temps.append(temp_sensors.read_avg_temperature([True, True, True, True], "c"))
+            while times[0] < now - window:
+                times.pop(0)
+                temps.pop(0)
+
+            if now - start >= window:
+                slope = np.polyfit(np.array(times) - times[0], temps, 1)[0] * 60  # °C/min
+                sys.stdout.write(f"\rCooling down  Temp: {temps[-1]:.2f}°C  Slope: {slope:+.3f}°C/min  "
+                                 f"Waited: {(now - start) / 60:.1f} min                    ")
+                sys.stdout.flush()
+                if abs(slope) < slope_threshold:
+                    print(f"\nEquilibrium reached at {temps[-1]:.2f}°C.")
+                    return True
+
+            if now - start >= timeout_minutes * 60:
+                print(f"\nNo equilibrium after {timeout_minutes:.0f} min. Continuing anyway.")
+                return False
+
+            time.sleep(poll_interval)
+    finally:
+        element_pwm.stop()
+        GPIO.cleanup()
+
+
+def run_queue(queue_path):
+    specs = load_queue(queue_path)
+    state_path = queue_path + ".state.json"
+    state = load_state(state_path)
+    temp_sensors = TemperatureSensors()
+
+    for index, spec in enumerate(specs):
+        key = str(index)
+        if key not in state:
+            # Trial numbers are fixed on first start, so a resumed trial overwrites its own partial files
+            state[key] = {field: spec[field] for field in RESUME_FIELDS}
+            state[key].update({"first_trial": next_trial_number(spec["mode"]), "completed": 0})
+            save_state(state_path, state)
+        elif any(state[key].get(field) != spec[field] for field in RESUME_FIELDS):
+            # The queue was edited since this entry started; resuming would write over another mode's trials
+            raise ValueError(f"Queue entry {index} ({spec['mode']}) no longer matches {state_path} "
+                             f"({state[key].get('mode')}). Restore the queue or delete the state file.")
+
+        while state[key]["completed"] < spec["repetitions"]:
+            trial_number = state[key]["first_trial"] + state[key]["completed"]
+            print(f"\n[Queue] {spec['mode']} repetition {state[key]['completed'] + 1}/{spec['repetitions']} "
+                  f"-> raw_data_{trial_number}.csv")
+
+            wait_for_equilibrium(temp_sensors)
+            print("\n\n\n")
+
+            if not run_trial(spec["mode"], spec["baseline"], True, spec["duration"],
+                             spec["shadow"], trial_number=trial_number):
+                print("[Queue] Trial interrupted. Re-run the same command to resume.")
+                return
+
+            state[key]["completed"] += 1
+            save_state(state_path, state)
+
+    print("[Queue] All trials complete.")
+
+
+if __name__=="__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python trial_queue.py <queue.json>")
+        sys.exit(1)
+    install_signal_handler()  # Before the first cool-down, so SIGUSR1 there doesn't kill the runner
+    run_queue(sys.argv[1])